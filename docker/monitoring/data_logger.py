@@ -5,14 +5,19 @@ Logs all measurements and provides monitoring dashboard API
 """
 
 import os
-import json
+import sys
+import gzip
+import shutil
 import logging
 import time
+from logging.handlers import RotatingFileHandler
 import requests
-from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util import Retry
 from threading import Thread
-from flask import Flask, jsonify
-from collections import defaultdict
+from queue import SimpleQueue, Empty
+import orjson
+from flask import Flask, Response, request
 
 # Configure logging
 logging.basicConfig(
@@ -21,8 +26,93 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Maximum status records written per batch by the writer thread
+LOG_BATCH_SIZE = 64
+
+# Status log rotation
+STATUS_LOG_MAX_BYTES = int(os.getenv('STATUS_LOG_MAX_BYTES', 64 * 1024 * 1024))
+STATUS_LOG_BACKUPS = int(os.getenv('STATUS_LOG_BACKUPS', 10))
+
+# Estimated size of one scada_status.jsonl record, used to size tail reads
+STATUS_LINE_ESTIMATE = 2048
+
 app = Flask(__name__)
 
+
+def _tail_lines(path, count, block_size):
+    """Return the last `count` lines of a file, reading backwards from the end"""
+    with open(path, 'rb') as f:
+        pos = f.seek(0, os.SEEK_END)
+        data = b''
+        while pos > 0 and data.count(b'\n') <= count:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            data = f.read(step) + data
+            block_size *= 2
+    
+    lines = data.splitlines()
+    if pos > 0:
+        # First line may have been cut by the seek
+        lines = lines[1:]
+    return [line for line in lines if line.strip()][-count:]
+
+
+# Cached (second, formatted prefix) for _fast_iso
+_iso_prefix = (None, '')
+
+
+def _fast_iso(ts):
+    """Format an epoch timestamp like datetime.now().isoformat()"""
+    global _iso_prefix
+    sec = int(ts)
+    last_sec, prefix = _iso_prefix
+    if sec != last_sec:
+        # Only rebuild the date/time part once per second
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(sec))
+        _iso_prefix = (sec, prefix)
+    return f"{prefix}.{int((ts - sec) * 1e6):06d}"
+
+
+def _json_response(data, status=200):
+    """Serialize a response body with orjson"""
+    return Response(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS),
+                    status=status, mimetype='application/json')
+
+
+# Pre-encoded health reply around the live timestamp
+_HEALTH_PREFIX = b'{"status":"healthy","timestamp":"'
+_HEALTH_SUFFIX = b'"}'
+
+
+def _health_response():
+    """Build the health check reply without going through a serializer"""
+    return Response(_HEALTH_PREFIX + _fast_iso(time.time()).encode() + _HEALTH_SUFFIX,
+                    mimetype='application/json')
+
+
+class GzipRotatingFileHandler(RotatingFileHandler):
+    """Size-rotated log file whose rotated copies are gzip-compressed"""
+    
+    def __init__(self, filename, max_bytes, backup_count):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count,
+                         encoding='utf-8', delay=True)
+        # Records already end with a newline
+        self.terminator = ''
+    
+    def rotation_filename(self, default_name):
+        return default_name + '.gz'
+    
+    def rotate(self, source, dest):
+        """Compress the full log into its backup slot"""
+        with open(source, 'rb') as src, gzip.open(dest, 'wb', compresslevel=1) as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+    
+    def handleError(self, record):
+        logger.error(f"Failed to write status log: {sys.exc_info()[1]}")
+
+
 class DataLogger:
     """Logs and monitors SCADA data"""
     
@@ -30,22 +120,72 @@ class DataLogger:
         self.scada_server_url = scada_server_url
         self.poll_interval = poll_interval
         self.running = False
-        self.stats = defaultdict(lambda: {
-            'total_records': 0,
-            'errors': 0,
-            'last_update': None,
-            'min_values': {},
-            'max_values': {},
-            'avg_values': {}
-        })
+        
+        # Persistent keep-alive connection to the SCADA server
+        self.session = requests.Session()
+        self.session.mount('http://', HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=2,
+            max_retries=Retry(total=2, backoff_factor=0.1)
+        ))
+        self.session.headers['Connection'] = 'keep-alive'
+        
+        self.stats = {
+            'global': {
+                'total_records': 0,
+                'errors': 0,
+                'last_update': None
+            }
+        }
         self.log_path = os.getenv('LOG_PATH', '/app/logs')
         
+        # Status log is rotated by size and written by a dedicated writer thread
+        self.status_file = os.path.join(self.log_path, 'scada_status.jsonl')
+        self._status_log = GzipRotatingFileHandler(
+            self.status_file, STATUS_LOG_MAX_BYTES, STATUS_LOG_BACKUPS
+        )
+        self._write_q = SimpleQueue()
+        self._writer_thread = None
+    
+    def _write_batch(self, batch):
+        """Append a batch of status records to the log file"""
+        try:
+            text = b''.join(
+                orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE) for record in batch
+            ).decode()
+        except orjson.JSONEncodeError as e:
+            logger.error(f"Failed to write status log: {e}")
+            return
+        
+        # emit() rotates the file first if this batch would overflow it
+        self._status_log.emit(logging.makeLogRecord({'msg': text}))
+    
+    def _writer_loop(self):
+        """Write queued status records, batching whatever has accumulated"""
+        running = True
+        while running:
+            batch = [self._write_q.get()]
+            try:
+                while len(batch) < LOG_BATCH_SIZE:
+                    batch.append(self._write_q.get_nowait())
+            except Empty:
+                pass
+            
+            # None is the shutdown sentinel queued by stop()
+            if None in batch:
+                batch = batch[:batch.index(None)]
+                running = False
+            if batch:
+                self._write_batch(batch)
+        
+        self._status_log.close()
+    
     def poll_scada_server(self):
         """Poll SCADA server for data"""
         try:
-            response = requests.get(f"{self.scada_server_url}/api/status", timeout=5)
+            response = self.session.get(f"{self.scada_server_url}/api/status", timeout=5)
             if response.status_code == 200:
-                data = response.json()
+                data = orjson.loads(response.content)
                 self._process_measurements(data)
                 return data
             else:
@@ -54,12 +194,15 @@ class DataLogger:
         except requests.exceptions.RequestException as e:
             logger.error(f"Failed to connect to SCADA server: {e}")
             self.stats['global']['errors'] += 1
+        except orjson.JSONDecodeError as e:
+            logger.error(f"Invalid response from SCADA server: {e}")
+            self.stats['global']['errors'] += 1
         
         return None
     
     def _process_measurements(self, data):
         """Process and log measurements"""
-        timestamp = datetime.now().isoformat()
+        timestamp = _fast_iso(time.time())
         
         # Log overall status
         status_log = {
@@ -67,12 +210,8 @@ class DataLogger:
             'data': data
         }
         
-        status_file = os.path.join(self.log_path, 'scada_status.jsonl')
-        try:
-            with open(status_file, 'a') as f:
-                f.write(json.dumps(status_log) + '\n')
-        except Exception as e:
-            logger.error(f"Failed to write status log: {e}")
+        # Hand off to the writer thread so disk latency never stalls polling
+        self._write_q.put_nowait(status_log)
         
         # Update stats
         self.stats['global']['total_records'] += 1
@@ -83,10 +222,10 @@ class DataLogger:
     def get_statistics(self):
         """Get statistics for monitoring"""
         return {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _fast_iso(time.time()),
             'log_path': self.log_path,
             'poll_interval': self.poll_interval,
-            'stats': dict(self.stats)
+            'stats': self.stats
         }
     
     def start(self):
@@ -97,6 +236,10 @@ class DataLogger:
         # Start polling thread
         polling_thread = Thread(target=self._polling_loop, daemon=True)
         polling_thread.start()
+        
+        # Start status log writer thread
+        self._writer_thread = Thread(target=self._writer_loop, daemon=True)
+        self._writer_thread.start()
     
     def _polling_loop(self):
         """Periodically poll and log SCADA data"""
@@ -111,6 +254,12 @@ class DataLogger:
         """Stop the data logger"""
         self.running = False
         logger.info("Stopping Data Logger")
+        
+        # Let the writer drain pending records and close the log
+        if self._writer_thread is not None:
+            self._write_q.put_nowait(None)
+            self._writer_thread.join(timeout=5)
+            self._writer_thread = None
 
 
 # Initialize Data Logger
@@ -124,31 +273,42 @@ data_logger = DataLogger(scada_server_url, poll_interval)
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
     """Get logging statistics"""
-    return jsonify(data_logger.get_statistics())
+    return _json_response(data_logger.get_statistics())
+
+
+@app.before_request
+def fast_health():
+    """Answer liveness probes before view dispatch"""
+    if request.method == 'GET' and request.path == '/api/health':
+        return _health_response()
 
 
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+    return _health_response()
 
 
 @app.route('/api/logs', methods=['GET'])
 def get_logs():
     """Get recent log entries"""
-    limit = request.args.get('limit', 50, type=int)
+    limit = max(request.args.get('limit', 50, type=int), 0)
+    recent_logs = []
     
     try:
-        log_file = os.path.join(data_logger.log_path, 'scada_status.jsonl')
-        if os.path.exists(log_file):
-            with open(log_file, 'r') as f:
-                lines = f.readlines()
-                recent_logs = [json.loads(line) for line in lines[-limit:]]
-            return jsonify({'logs': recent_logs, 'count': len(recent_logs)})
-    except Exception as e:
+        log_file = data_logger.status_file
+        if limit and os.path.exists(log_file):
+            lines = _tail_lines(log_file, limit, limit * STATUS_LINE_ESTIMATE)
+            for line in lines:
+                # Skip a malformed line rather than failing the whole response
+                try:
+                    recent_logs.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    logger.warning(f"Skipping malformed line in {log_file}")
+    except OSError as e:
         logger.error(f"Error reading logs: {e}")
     
-    return jsonify({'logs': [], 'count': 0})
+    return _json_response({'logs': recent_logs, 'count': len(recent_logs)})
 
 
 def main():
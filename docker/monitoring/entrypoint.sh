@@ -4,4 +4,4 @@ set -e
 echo "=== Starting Data Logger and Monitoring Service ==="
 echo "SCADA Server URL: $SCADA_SERVER_URL"
 
-python data_logger.py
+exec gunicorn -c gunicorn.conf.py data_logger:app
@@ -0,0 +1,24 @@
+"""
+Gunicorn configuration for the Data Logger and Monitoring Service
+Runs a single process so statistics and the polling thread are shared by
+every request; concurrency comes from gthread worker threads.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('MONITORING_PORT', 8081)}"
+workers = 1
+worker_class = 'gthread'
+threads = int(os.getenv('API_THREADS', 4))
+
+
+def post_worker_init(worker):
+    """Start SCADA polling once the worker has loaded the app"""
+    from data_logger import data_logger
+    data_logger.start()
+
+
+def worker_exit(server, worker):
+    """Stop SCADA polling and flush logs on worker shutdown"""
+    from data_logger import data_logger
+    data_logger.stop()
@@ -6,4 +6,4 @@ echo "RTU ID: $RTU_ID"
 echo "RTU Name: $RTU_NAME"
 echo "DNP3 Port: $DNP3_PORT"
 
-python rtu_outstation.py
+exec python rtu_outstation.py
@@ -0,0 +1,38 @@
+# cython: language_level=3
+"""
+Compiled random walk kernel for the RTU transformer simulator
+Drop-in replacement for rtu_outstation._step, built when the image is built
+"""
+
+from libc.math cimport sqrt
+
+# Power calculation constants, matching rtu_outstation
+cdef double POWER_FACTOR = 0.95
+cdef double THREE_PHASE_KVA = 3.0 / 1000.0
+cdef double REACTIVE_COEFF = sqrt(1.0 - POWER_FACTOR * POWER_FACTOR)
+
+
+cdef inline double _walk(double value, double lo, double hi, double step) noexcept nogil:
+    """Apply one random walk step and clamp to [lo, hi]"""
+    value += step
+    if value < lo:
+        return lo
+    if value > hi:
+        return hi
+    return value
+
+
+cpdef tuple step(double[::1] state, double[::1] steps, double[::1] mins, double[::1] maxs):
+    """Apply random walk steps to (V, I, F, T) in place, return power values"""
+    cdef Py_ssize_t k
+    cdef double apparent_power, real_power, reactive_power
+    
+    with nogil:
+        for k in range(4):
+            state[k] = _walk(state[k], mins[k], maxs[k], steps[k])
+        
+        apparent_power = state[0] * state[1] * THREE_PHASE_KVA  # kVA
+        real_power = apparent_power * POWER_FACTOR  # kW
+        reactive_power = apparent_power * REACTIVE_COEFF  # kVAR
+    
+    return apparent_power, real_power, reactive_power
@@ -5,12 +5,19 @@ Simulates electrical transformer substation with realistic parameters
 """
 
 import os
-import json
-import random
+import math
+import sys
+import signal
 import logging
-from datetime import datetime
-from threading import Thread
+import sqlite3
+from threading import Thread, Event
+from queue import SimpleQueue, Empty
 import time
+from collections import deque
+import numpy as np
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
 
 try:
     from pydnp3 import opendnp3, openpal, asiopal, asiodnp3
@@ -18,6 +25,18 @@ except ImportError:
     print("WARNING: pydnp3 not available, using mock implementation")
     opendnp3 = None
 
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """Fallback decorator that leaves the function uncompiled"""
+        def decorator(func):
+            return func
+        return decorator
+
 # Configure logging
 logging.basicConfig(
     level=os.getenv('LOG_LEVEL', 'INFO'),
@@ -25,9 +44,93 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Measurement storage, shared by all RTUs and read by the SCADA master
+MEASUREMENT_DB = os.getenv('MEASUREMENT_DB', '/app/logs/measurements.db')
+MEASUREMENT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS measurements (
+    ts REAL NOT NULL,
+    rtu_id INTEGER NOT NULL,
+    voltage REAL,
+    current REAL,
+    frequency REAL,
+    temperature REAL,
+    real_power_kw REAL,
+    reactive_power_kvar REAL,
+    apparent_power_kva REAL,
+    power_factor REAL,
+    load_percentage REAL,
+    status TEXT,
+    PRIMARY KEY (rtu_id, ts)
+)
+"""
+INSERT_MEASUREMENT = 'INSERT OR REPLACE INTO measurements VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+
+# Maximum rows inserted per transaction by the writer thread
+LOG_BATCH_SIZE = 64
+
+# Measurement retention, enforced by the writer thread
+MEASUREMENT_RETENTION_DAYS = float(os.getenv('MEASUREMENT_RETENTION_DAYS', 7))
+PRUNE_INTERVAL = 3600  # seconds between retention passes
+
+# Shared HTTP session for pushing measurements to the SCADA master
+http_session = requests.Session()
+http_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+http_session.headers['Connection'] = 'keep-alive'
+
+
+# Cached (second, formatted prefix) for _fast_iso
+_iso_prefix = (None, '')
+
+
+def _fast_iso(ts):
+    """Format an epoch timestamp like datetime.now().isoformat()"""
+    global _iso_prefix
+    sec = int(ts)
+    last_sec, prefix = _iso_prefix
+    if sec != last_sec:
+        # Only rebuild the date/time part once per second
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(sec))
+        _iso_prefix = (sec, prefix)
+    return f"{prefix}.{int((ts - sec) * 1e6):06d}"
+
+# Random walk step size for (voltage, current, frequency, temperature)
+WALK_STEPS = np.array([0.5, 5.0, 0.02, 0.3])
+
+# Power calculation constants
+POWER_FACTOR = 0.95                                  # Typical transformer PF
+THREE_PHASE_KVA = 3.0 / 1000.0                       # 3-phase V * I to kVA
+REACTIVE_COEFF = math.sqrt(1.0 - POWER_FACTOR ** 2)  # kVAR per kVA at POWER_FACTOR
+
+
+@njit(cache=True, fastmath=True)
+def _step(state, steps, mins, maxs):
+    """Apply random walk steps to (V, I, F, T) in place, return power values"""
+    for k in range(4):
+        state[k] = min(maxs[k], max(mins[k], state[k] + steps[k]))
+    
+    apparent_power = state[0] * state[1] * THREE_PHASE_KVA  # kVA
+    real_power = apparent_power * POWER_FACTOR  # kW
+    reactive_power = apparent_power * REACTIVE_COEFF  # kVAR
+    return apparent_power, real_power, reactive_power
+
+
+try:
+    # Prefer the AOT-compiled Cython kernel when it has been built (see setup.py)
+    from rtu_kernel import step as _step
+except ImportError:
+    if not NUMBA_AVAILABLE:
+        print("WARNING: rtu_kernel and numba not available, using uncompiled measurement kernel")
+
+
 class TransformerSimulator:
     """Simulates electrical transformer parameters"""
     
+    __slots__ = (
+        'rtu_id', 'min_voltage', 'max_voltage', 'min_current', 'max_current',
+        'min_freq', 'max_freq', 'min_temp', 'max_temp',
+        '_rng', '_state', '_mins', '_maxs', '_load_scale', '_template'
+    )
+    
     def __init__(self, rtu_id, min_voltage, max_voltage, min_current, max_current, 
                  min_freq, max_freq, min_temp, max_temp):
         self.rtu_id = rtu_id
@@ -40,48 +143,54 @@ class TransformerSimulator:
         self.min_temp = min_temp
         self.max_temp = max_temp
         
-        # Current values with slight noise
-        self.voltage = random.uniform(min_voltage, max_voltage)
-        self.current = random.uniform(min_current, max_current)
-        self.frequency = random.uniform(min_freq, max_freq)
-        self.temperature = random.uniform(min_temp, max_temp)
+        # Bounds and current values stored as (V, I, F, T) for _step
+        self._rng = np.random.default_rng(seed=rtu_id)
+        self._mins = np.array([min_voltage, min_current, min_freq, min_temp], dtype=np.float64)
+        self._maxs = np.array([max_voltage, max_current, max_freq, max_temp], dtype=np.float64)
+        self._state = self._rng.uniform(self._mins, self._maxs)
+        self._load_scale = 100.0 / max_current
         
-    def get_measurements(self):
-        """Generate realistic electrical measurements with brownian motion"""
-        # Add small random walk to simulate natural variations
-        self.voltage += random.uniform(-0.5, 0.5)
-        self.voltage = max(self.min_voltage, min(self.max_voltage, self.voltage))
-        
-        self.current += random.uniform(-5, 5)
-        self.current = max(self.min_current, min(self.max_current, self.current))
-        
-        self.frequency += random.uniform(-0.02, 0.02)
-        self.frequency = max(self.min_freq, min(self.max_freq, self.frequency))
-        
-        self.temperature += random.uniform(-0.3, 0.3)
-        self.temperature = max(self.min_temp, min(self.max_temp, self.temperature))
-        
-        # Calculate power parameters
-        power_factor = 0.95  # Typical transformer PF
-        apparent_power = (self.voltage * self.current * 3) / 1000  # 3-phase, kVA
-        real_power = apparent_power * power_factor  # kW
-        reactive_power = (apparent_power ** 2 - real_power ** 2) ** 0.5  # kVAR
-        load_percent = (self.current / self.max_current) * 100
-        
-        return {
-            'timestamp': datetime.now().isoformat(),
-            'rtu_id': self.rtu_id,
-            'voltage': round(self.voltage, 2),
-            'current': round(self.current, 2),
-            'frequency': round(self.frequency, 3),
-            'temperature': round(self.temperature, 2),
-            'real_power_kw': round(real_power, 2),
-            'reactive_power_kvar': round(reactive_power, 2),
-            'apparent_power_kva': round(apparent_power, 2),
-            'power_factor': power_factor,
-            'load_percentage': round(load_percent, 2),
-            'status': 'NORMAL' if self.temperature < 80 else 'WARNING'
+        # Measurement dict with constant fields filled in, copied every tick
+        self._template = {
+            'timestamp': None,
+            'rtu_id': rtu_id,
+            'voltage': None,
+            'current': None,
+            'frequency': None,
+            'temperature': None,
+            'real_power_kw': None,
+            'reactive_power_kvar': None,
+            'apparent_power_kva': None,
+            'power_factor': POWER_FACTOR,
+            'load_percentage': None,
+            'status': None
         }
+        
+    def get_measurements(self, ts=None):
+        """Generate realistic electrical measurements with brownian motion"""
+        # Add small random walk to simulate natural variations, all four
+        # steps drawn in one Generator call; scalar bounds keep the draw
+        # off NumPy's broadcasting path
+        steps = self._rng.uniform(-1.0, 1.0, 4) * WALK_STEPS
+        apparent_power, real_power, reactive_power = _step(
+            self._state, steps, self._mins, self._maxs
+        )
+        voltage, current, frequency, temperature = self._state.tolist()
+        load_percent = current * self._load_scale
+        
+        # Values are non-negative, so int(x * 100 + 0.5) / 100 rounds to 2 places
+        out = self._template.copy()
+        out['timestamp'] = _fast_iso(time.time() if ts is None else ts)
+        out['voltage'] = int(voltage * 100 + 0.5) / 100
+        out['current'] = int(current * 100 + 0.5) / 100
+        out['frequency'] = int(frequency * 1000 + 0.5) / 1000
+        out['temperature'] = int(temperature * 100 + 0.5) / 100
+        out['real_power_kw'] = int(real_power * 100 + 0.5) / 100
+        out['reactive_power_kvar'] = int(reactive_power * 100 + 0.5) / 100
+        out['apparent_power_kva'] = int(apparent_power * 100 + 0.5) / 100
+        out['load_percentage'] = int(load_percent * 100 + 0.5) / 100
+        out['status'] = 'NORMAL' if temperature < 80 else 'WARNING'
+        return out
 
 
 class MockDNP3Outstation:
@@ -104,7 +213,8 @@ class DNP3OutstationRTU:
     
     def __init__(self, rtu_id, rtu_name, dnp3_port, outstation_addr, 
                  min_voltage, max_voltage, min_current, max_current,
-                 min_freq, max_freq, min_temp, max_temp, poll_interval=5):
+                 min_freq, max_freq, min_temp, max_temp, poll_interval=5,
+                 master_url=None):
         
         self.rtu_id = rtu_id
         self.rtu_name = rtu_name
@@ -112,6 +222,7 @@ class DNP3OutstationRTU:
         self.outstation_addr = outstation_addr
         self.poll_interval = poll_interval
         self.running = False
+        self.ingest_url = f"{master_url}/api/ingest/{rtu_id}" if master_url else None
         
         # Initialize transformer simulator
         self.simulator = TransformerSimulator(
@@ -125,8 +236,90 @@ class DNP3OutstationRTU:
         else:
             self.outstation = MockDNP3Outstation(dnp3_port)
             
-        self.measurement_history = []
+        # Keep only last 100 measurements in memory
+        self.measurement_history = deque(maxlen=100)
+        
+        # Measurement database is opened once and written by a dedicated writer thread
+        self._write_q = SimpleQueue()
+        self._writer_thread = None
+        self._db = self._open_db()
+        
+    def _open_db(self):
+        """Open the measurement database in WAL mode"""
+        try:
+            db = sqlite3.connect(MEASUREMENT_DB, timeout=5, isolation_level=None,
+                                 check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            db.execute(MEASUREMENT_SCHEMA)
+            return db
+        except sqlite3.Error as e:
+            logger.error(f"Failed to open measurement database {MEASUREMENT_DB}: {e}")
+            return None
+    
+    def _write_batch(self, batch):
+        """Insert a batch of measurement rows in a single transaction"""
+        try:
+            if self._db is None:
+                raise sqlite3.OperationalError(f"{MEASUREMENT_DB} is not open")
+            self._db.execute('BEGIN')
+            self._db.executemany(INSERT_MEASUREMENT, batch)
+            self._db.execute('COMMIT')
+        except sqlite3.Error as e:
+            logger.error(f"Failed to write measurements: {e}")
+            if self._db is not None and self._db.in_transaction:
+                self._db.execute('ROLLBACK')
+    
+    def _prune_measurements(self):
+        """Delete this RTU's rows older than the retention period"""
+        cutoff = time.time() - MEASUREMENT_RETENTION_DAYS * 86400
+        try:
+            if self._db is not None:
+                self._db.execute('DELETE FROM measurements WHERE rtu_id = ? AND ts < ?',
+                                 (self.rtu_id, cutoff))
+        except sqlite3.Error as e:
+            logger.error(f"Failed to prune measurements: {e}")
+    
+    def _writer_loop(self):
+        """Write queued measurement rows, batching whatever has accumulated"""
+        next_prune = 0.0
+        running = True
+        while running:
+            batch = [self._write_q.get()]
+            try:
+                while len(batch) < LOG_BATCH_SIZE:
+                    batch.append(self._write_q.get_nowait())
+            except Empty:
+                pass
+            
+            # None is the shutdown sentinel queued by stop()
+            if None in batch:
+                batch = batch[:batch.index(None)]
+                running = False
+            if batch:
+                self._write_batch(batch)
+            
+            if MEASUREMENT_RETENTION_DAYS > 0 and time.monotonic() >= next_prune:
+                self._prune_measurements()
+                next_prune = time.monotonic() + PRUNE_INTERVAL
         
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+    
+    def _push_to_master(self, measurements):
+        """Send measurements directly to the SCADA master ingest endpoint"""
+        try:
+            response = http_session.post(
+                self.ingest_url,
+                data=orjson.dumps(measurements),
+                headers={'Content-Type': 'application/json'},
+                timeout=1
+            )
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Failed to push measurements to SCADA master: {e}")
+    
     def _init_dnp3_outstation(self):
         """Initialize actual DNP3 outstation"""
         try:
@@ -161,20 +354,23 @@ class DNP3OutstationRTU:
     
     def update_measurements(self):
         """Update and log measurements"""
-        measurements = self.simulator.get_measurements()
+        ts = time.time()
+        measurements = self.simulator.get_measurements(ts)
         self.measurement_history.append(measurements)
         
-        # Keep only last 100 measurements in memory
-        if len(self.measurement_history) > 100:
-            self.measurement_history = self.measurement_history[-100:]
+        if self.ingest_url:
+            self._push_to_master(measurements)
         
-        # Log to file
-        log_file = f"/app/logs/rtu_{self.rtu_id}_measurements.json"
-        try:
-            with open(log_file, 'a') as f:
-                f.write(json.dumps(measurements) + '\n')
-        except Exception as e:
-            logger.error(f"Failed to write measurements: {e}")
+        # Hand off to the writer thread so disk latency never stalls measuring
+        row = (
+            ts, self.rtu_id,
+            measurements['voltage'], measurements['current'],
+            measurements['frequency'], measurements['temperature'],
+            measurements['real_power_kw'], measurements['reactive_power_kvar'],
+            measurements['apparent_power_kva'], measurements['power_factor'],
+            measurements['load_percentage'], measurements['status']
+        )
+        self._write_q.put_nowait(row)
         
         logger.info(f"RTU {self.rtu_id}: V={measurements['voltage']}V, "
                    f"I={measurements['current']}A, F={measurements['frequency']}Hz, "
@@ -193,6 +389,10 @@ class DNP3OutstationRTU:
         # Start measurement update thread
         measurement_thread = Thread(target=self._measurement_loop, daemon=True)
         measurement_thread.start()
+        
+        # Start measurement database writer thread
+        self._writer_thread = Thread(target=self._writer_loop, daemon=True)
+        self._writer_thread.start()
     
     def _measurement_loop(self):
         """Periodically update measurements"""
@@ -207,6 +407,12 @@ class DNP3OutstationRTU:
         """Stop the RTU"""
         self.running = False
         logger.info(f"Stopping RTU {self.rtu_id}")
+        
+        # Let the writer drain pending rows and close the database
+        if self._writer_thread is not None:
+            self._write_q.put_nowait(None)
+            self._writer_thread.join(timeout=5)
+            self._writer_thread = None
 
 
 def main():
@@ -226,6 +432,7 @@ def main():
     min_temp = float(os.getenv('MIN_TEMP', 20))
     max_temp = float(os.getenv('MAX_TEMP', 85))
     poll_interval = int(os.getenv('POLL_INTERVAL', 5))
+    master_url = os.getenv('SCADA_MASTER_URL', 'http://scada-master:8080')
     
     logger.info(f"Initializing RTU {rtu_id}: {rtu_name}")
     logger.info(f"Configuration: Port={dnp3_port}, Addr={outstation_addr}")
@@ -234,18 +441,25 @@ def main():
     rtu = DNP3OutstationRTU(
         rtu_id, rtu_name, dnp3_port, outstation_addr,
         min_voltage, max_voltage, min_current, max_current,
-        min_freq, max_freq, min_temp, max_temp, poll_interval
+        min_freq, max_freq, min_temp, max_temp, poll_interval,
+        master_url=master_url
     )
     
     rtu.start()
     
-    try:
-        # Keep running
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        logger.info("Received interrupt signal")
+    def shutdown(signum, frame):
+        logger.info(f"Received signal {signum}")
         rtu.stop()
+        sys.exit(0)
+    
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+    
+    # Sleep until a signal arrives instead of waking up periodically
+    if hasattr(signal, 'pause'):
+        signal.pause()
+    else:
+        Event().wait()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,19 @@
+"""
+Build script for the compiled RTU measurement kernel
+Usage: python setup.py build_ext --inplace
+"""
+
+from setuptools import setup
+from Cython.Build import cythonize
+
+setup(
+    name='rtu-kernel',
+    ext_modules=cythonize(
+        'rtu_kernel.pyx',
+        compiler_directives={
+            'boundscheck': False,
+            'wraparound': False,
+            'cdivision': True
+        }
+    )
+)
@@ -5,4 +5,4 @@ echo "=== Starting SCADA Master Server ==="
 echo "Master ID: $MASTER_ID"
 echo "API Port: $API_PORT"
 
-python scada_master.py
+exec gunicorn -c gunicorn.conf.py scada_master:app
@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration for the SCADA Master Server
+Runs a single process so outstation state and the polling thread are
+shared by every request; concurrency comes from gthread worker threads.
+"""
+
+import os
+
+bind = f"0.0.0.0:{os.getenv('API_PORT', 8080)}"
+workers = 1
+worker_class = 'gthread'
+threads = int(os.getenv('API_THREADS', 8))
+
+# Hold idle connections open for polling clients
+keepalive = 65
+
+
+def post_worker_init(worker):
+    """Start outstation polling once the worker has loaded the app"""
+    from scada_master import scada_master
+    scada_master.start()
+
+
+def worker_exit(server, worker):
+    """Stop outstation polling on worker shutdown"""
+    from scada_master import scada_master
+    scada_master.stop()
@@ -5,13 +5,16 @@ Polls multiple RTU/IED outstations and provides REST API
 """
 
 import os
-import json
+import hashlib
 import logging
+import sqlite3
 import time
-from datetime import datetime
-from threading import Thread
-from collections import defaultdict
-from flask import Flask, jsonify, request
+from threading import Thread, Lock
+from collections import defaultdict, deque
+from itertools import islice
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
+import orjson
+from flask import Flask, Response, request
 
 # Configure logging
 logging.basicConfig(
@@ -22,20 +25,91 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
+# Measurements kept in memory per RTU
+HISTORY_SIZE = 1000
+
+# Seconds a computed system status snapshot is reused
+STATUS_CACHE_TTL = 0.2
+
+# Measurement database written by the RTUs
+MEASUREMENT_DB = os.getenv('MEASUREMENT_DB', '/app/logs/measurements.db')
+MEASUREMENT_FIELDS = (
+    'rtu_id', 'voltage', 'current', 'frequency', 'temperature',
+    'real_power_kw', 'reactive_power_kvar', 'apparent_power_kva',
+    'power_factor', 'load_percentage', 'status'
+)
+# Keys every pushed measurement must carry
+REQUIRED_MEASUREMENT_KEYS = frozenset(MEASUREMENT_FIELDS) | {'timestamp'}
+SELECT_LATEST = (
+    f"SELECT ts, {', '.join(MEASUREMENT_FIELDS)} FROM measurements "
+    "WHERE rtu_id = ? ORDER BY ts DESC LIMIT 1"
+)
+
+
+# Cached (second, formatted prefix) for _fast_iso
+_iso_prefix = (None, '')
+
+
+def _fast_iso(ts):
+    """Format an epoch timestamp like datetime.now().isoformat()"""
+    global _iso_prefix
+    sec = int(ts)
+    last_sec, prefix = _iso_prefix
+    if sec != last_sec:
+        # Only rebuild the date/time part once per second
+        prefix = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(sec))
+        _iso_prefix = (sec, prefix)
+    return f"{prefix}.{int((ts - sec) * 1e6):06d}"
+
+
+def _json_response(data, status=200):
+    """Serialize a response body with orjson"""
+    return Response(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS),
+                    status=status, mimetype='application/json')
+
+
+# Pre-encoded health reply around the live timestamp
+_HEALTH_PREFIX = b'{"status":"healthy","timestamp":"'
+_HEALTH_SUFFIX = b'"}'
+
+
+def _health_response():
+    """Build the health check reply without going through a serializer"""
+    return Response(_HEALTH_PREFIX + _fast_iso(time.time()).encode() + _HEALTH_SUFFIX,
+                    mimetype='application/json')
+
+
 class SCADAMasterServer:
     """DNP3 Master SCADA Server"""
     
     def __init__(self):
         self.master_id = int(os.getenv('MASTER_ID', 1))
         self.outstations = {}
-        self.measurement_data = defaultdict(list)
+        self.measurement_data = defaultdict(lambda: deque(maxlen=HISTORY_SIZE))
+        self.latest_measurement = {}
         self.last_update = {}
+        self._latest_cache = {}
+        self._data_lock = Lock()
+        self._db = None
+        self._db_lock = Lock()
+        self._status_cache = (0.0, None)
+        self._status_lock = Lock()
         self.running = False
         self.poll_interval = int(os.getenv('POLL_INTERVAL', 5))
         
         # Configure outstations
         self._configure_outstations()
         
+        # Configuration is immutable, so serialize and tag it once
+        self._config_bytes = orjson.dumps(self.config)
+        self._config_etag = hashlib.blake2b(self._config_bytes, digest_size=8).hexdigest()
+        
+        # Outstations are polled concurrently so a cycle takes max, not sum, of poll times
+        self._pool = ThreadPoolExecutor(
+            max_workers=min(32, max(1, len(self.outstations))),
+            thread_name_prefix='outstation-poll'
+        )
+        
     def _configure_outstations(self):
         """Configure outstation connections"""
         # Outstation 1
@@ -56,54 +130,137 @@ class SCADAMasterServer:
             'connection_status': 'DISCONNECTED'
         }
         
+        # Configuration is fixed from here on, so build the API view once
+        self.config = {
+            'master_id': self.master_id,
+            'poll_interval': self.poll_interval,
+            'outstations': [
+                {
+                    'id': oid,
+                    'name': config['name'],
+                    'host': config['host'],
+                    'port': config['port'],
+                    'address': config['address']
+                }
+                for oid, config in self.outstations.items()
+            ]
+        }
+        
         logger.info(f"Configured {len(self.outstations)} outstations")
     
     def poll_outstations(self):
         """Poll all outstations for measurements"""
-        for outstation_id, config in self.outstations.items():
-            try:
-                # Simulate polling - in production, would use real DNP3 library
-                logger.info(f"Polling outstation {outstation_id}: {config['name']}")
-                
-                # Update connection status
-                self.outstations[outstation_id]['connection_status'] = 'CONNECTED'
-                self.last_update[outstation_id] = datetime.now().isoformat()
-                
-            except Exception as e:
-                logger.error(f"Error polling outstation {outstation_id}: {e}")
-                self.outstations[outstation_id]['connection_status'] = 'ERROR'
+        futures = {
+            self._pool.submit(self._poll_one, outstation_id, config): outstation_id
+            for outstation_id, config in self.outstations.items()
+        }
+        
+        try:
+            for future in as_completed(futures, timeout=self.poll_interval * 0.9):
+                future.result()
+        except TimeoutError:
+            for future, outstation_id in futures.items():
+                if not future.done():
+                    logger.error(f"Timed out polling outstation {outstation_id}")
+                    self.outstations[outstation_id]['connection_status'] = 'ERROR'
     
-    def read_measurements_from_log(self, rtu_id):
-        """Read latest measurements from RTU log file"""
+    def _poll_one(self, outstation_id, config):
+        """Poll a single outstation"""
         try:
-            log_file = f"/app/logs/rtu_{rtu_id}_measurements.json"
-            if os.path.exists(log_file):
-                with open(log_file, 'r') as f:
-                    lines = f.readlines()
-                    if lines:
-                        latest = json.loads(lines[-1])
-                        self.measurement_data[rtu_id].append(latest)
-                        
-                        # Keep only last 1000 measurements
-                        if len(self.measurement_data[rtu_id]) > 1000:
-                            self.measurement_data[rtu_id] = self.measurement_data[rtu_id][-1000:]
-                        
-                        return latest
+            # Simulate polling - in production, would use real DNP3 library
+            logger.info(f"Polling outstation {outstation_id}: {config['name']}")
+            
+            # Update connection status
+            config['connection_status'] = 'CONNECTED'
+            self.last_update[outstation_id] = _fast_iso(time.time())
+            
         except Exception as e:
+            logger.error(f"Error polling outstation {outstation_id}: {e}")
+            config['connection_status'] = 'ERROR'
+    
+    def _store_measurement(self, rtu_id, measurement):
+        """Append a measurement to the RTU history"""
+        with self._data_lock:
+            self.measurement_data[rtu_id].append(measurement)
+    
+    def get_measurement_history(self, rtu_id, offset, limit):
+        """Return (total, page) of the stored measurements for an RTU"""
+        with self._data_lock:
+            measurements = self.measurement_data.get(rtu_id, ())
+            page = list(islice(measurements, max(offset, 0), max(offset, 0) + max(limit, 0)))
+            return len(measurements), page
+    
+    def ingest_measurement(self, rtu_id, measurement):
+        """Store a measurement pushed by an RTU"""
+        self.latest_measurement[rtu_id] = measurement
+        self._store_measurement(rtu_id, measurement)
+    
+    def _open_db(self):
+        """Open the measurement database once it has been created by an RTU"""
+        if self._db is None and os.path.exists(MEASUREMENT_DB):
+            self._db = sqlite3.connect(MEASUREMENT_DB, timeout=5, check_same_thread=False)
+        return self._db
+    
+    def read_latest_measurement(self, rtu_id):
+        """Read latest measurement for an RTU from the measurement database"""
+        try:
+            with self._db_lock:
+                db = self._open_db()
+                if db is None:
+                    return None
+                
+                # data_version only changes when another connection commits
+                version = db.execute('PRAGMA data_version').fetchone()[0]
+                cached = self._latest_cache.get(rtu_id)
+                if cached and cached[0] == version:
+                    return cached[2]
+                
+                row = db.execute(SELECT_LATEST, (rtu_id,)).fetchone()
+            
+            if row:
+                ts = row[0]
+                if cached and cached[1] == ts:
+                    # Another RTU committed, this one has nothing new
+                    self._latest_cache[rtu_id] = (version, ts, cached[2])
+                    return cached[2]
+                
+                latest = {'timestamp': _fast_iso(ts)}
+                latest.update(zip(MEASUREMENT_FIELDS, row[1:]))
+                self._latest_cache[rtu_id] = (version, ts, latest)
+                self._store_measurement(rtu_id, latest)
+                return latest
+        except sqlite3.Error as e:
             logger.error(f"Error reading measurements from RTU {rtu_id}: {e}")
         
         return None
     
     def get_current_status(self):
-        """Get current system status"""
+        """Get current system status, shared by callers within STATUS_CACHE_TTL"""
+        built_at, status = self._status_cache
+        if status is not None and time.monotonic() - built_at < STATUS_CACHE_TTL:
+            return status
+        
+        with self._status_lock:
+            # Another thread may have refreshed the snapshot while we waited
+            built_at, status = self._status_cache
+            if status is None or time.monotonic() - built_at >= STATUS_CACHE_TTL:
+                status = self._build_status()
+                self._status_cache = (time.monotonic(), status)
+            return status
+    
+    def _build_status(self):
+        """Build a system status snapshot"""
         status = {
             'master_id': self.master_id,
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': _fast_iso(time.time()),
             'outstations': {}
         }
         
         for rtu_id, config in self.outstations.items():
-            measurement = self.read_measurements_from_log(rtu_id)
+            # Prefer pushed measurements, fall back to the measurement database
+            measurement = self.latest_measurement.get(rtu_id)
+            if measurement is None:
+                measurement = self.read_latest_measurement(rtu_id)
             status['outstations'][rtu_id] = {
                 'name': config['name'],
                 'host': config['host'],
@@ -137,6 +294,8 @@ class SCADAMasterServer:
         """Stop the SCADA master server"""
         self.running = False
         logger.info("Stopping SCADA Master")
+        
+        self._pool.shutdown(wait=False, cancel_futures=True)
 
 
 # Initialize SCADA Master
@@ -148,7 +307,7 @@ scada_master = SCADAMasterServer()
 @app.route('/api/status', methods=['GET'])
 def get_status():
     """Get current system status"""
-    return jsonify(scada_master.get_current_status())
+    return _json_response(scada_master.get_current_status())
 
 
 @app.route('/api/outstation/<int:outstation_id>', methods=['GET'])
@@ -156,64 +315,83 @@ def get_outstation(outstation_id):
     """Get specific outstation data"""
     status = scada_master.get_current_status()
     if outstation_id in status['outstations']:
-        return jsonify(status['outstations'][outstation_id])
-    return jsonify({'error': 'Outstation not found'}), 404
+        return _json_response(status['outstations'][outstation_id])
+    return _json_response({'error': 'Outstation not found'}, 404)
 
 
 @app.route('/api/measurements/<int:rtu_id>', methods=['GET'])
 def get_measurements(rtu_id):
     """Get measurements history for RTU"""
-    measurements = scada_master.measurement_data.get(rtu_id, [])
-    
     # Support pagination
     limit = request.args.get('limit', 100, type=int)
     offset = request.args.get('offset', 0, type=int)
+    total, measurements = scada_master.get_measurement_history(rtu_id, offset, limit)
     
-    return jsonify({
+    return _json_response({
         'rtu_id': rtu_id,
-        'total_records': len(measurements),
+        'total_records': total,
         'limit': limit,
         'offset': offset,
-        'measurements': measurements[offset:offset+limit]
+        'measurements': measurements
     })
 
 
+@app.route('/api/ingest/<int:rtu_id>', methods=['POST'])
+def ingest_measurements(rtu_id):
+    """Receive measurements pushed by an RTU"""
+    if rtu_id not in scada_master.outstations:
+        return _json_response({'error': 'Outstation not found'}, 404)
+    
+    try:
+        measurement = orjson.loads(request.get_data())
+    except orjson.JSONDecodeError:
+        measurement = None
+    if not isinstance(measurement, dict):
+        return _json_response({'error': 'Invalid measurement payload'}, 400)
+    
+    missing = REQUIRED_MEASUREMENT_KEYS.difference(measurement)
+    if missing:
+        return _json_response({'error': 'Missing measurement fields',
+                               'missing': sorted(missing)}, 400)
+    if measurement['rtu_id'] != rtu_id:
+        return _json_response({'error': 'Measurement rtu_id does not match URL'}, 400)
+    
+    scada_master.ingest_measurement(rtu_id, measurement)
+    return _json_response({'status': 'accepted'}, 202)
+
+
+@app.before_request
+def fast_health():
+    """Answer liveness probes before view dispatch"""
+    if request.method == 'GET' and request.path == '/api/health':
+        return _health_response()
+
+
 @app.route('/api/health', methods=['GET'])
 def health():
     """Health check endpoint"""
-    return jsonify({'status': 'healthy', 'timestamp': datetime.now().isoformat()})
+    return _health_response()
 
 
 @app.route('/api/config', methods=['GET'])
 def get_config():
     """Get SCADA master configuration"""
-    return jsonify({
-        'master_id': scada_master.master_id,
-        'poll_interval': scada_master.poll_interval,
-        'outstations': [
-            {
-                'id': oid,
-                'name': config['name'],
-                'host': config['host'],
-                'port': config['port'],
-                'address': config['address']
-            }
-            for oid, config in scada_master.outstations.items()
-        ]
-    })
+    response = Response(scada_master._config_bytes, mimetype='application/json')
+    response.set_etag(scada_master._config_etag)
+    return response.make_conditional(request)
 
 
 @app.errorhandler(404)
 def not_found(error):
     """Handle 404 errors"""
-    return jsonify({'error': 'Endpoint not found'}), 404
+    return _json_response({'error': 'Endpoint not found'}, 404)
 
 
 @app.errorhandler(500)
 def internal_error(error):
     """Handle 500 errors"""
     logger.error(f"Internal server error: {error}")
-    return jsonify({'error': 'Internal server error'}), 500
+    return _json_response({'error': 'Internal server error'}, 500)
 
 
 def main():